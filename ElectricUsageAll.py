@@ -0,0 +1,18 @@
+import asyncio
+from smarthub import prices, raw_influxdb, raw_json
+from smarthub.core import load_config, run
+
+def main():
+    config = load_config('config.yaml')
+
+    sinks = [raw_influxdb.sink, prices.sink]
+    # The raw dump gets its own file here, output_file_usage already holds the priced usage
+    if config.output_file_raw:
+        sinks.append(raw_json.sink)
+    else:
+        print("output_file_raw is not set, skipping the raw JSON output.")
+
+    asyncio.run(run(config, sinks))
+
+if __name__ == "__main__":
+    main()
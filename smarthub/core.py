@@ -0,0 +1,236 @@
+import yaml
+import asyncio
+import aiohttp
+import orjson
+import datetime
+import threading
+from urllib.parse import urlparse
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential
+
+# Maximum concurrent readings requests
+FETCH_CONCURRENCY = 8
+
+# Responses worth retrying, anything else (e.g. a rejected login) fails straight away
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class Config:
+    def __init__(self, api_url, username, password, account, service_location, extract_days, interval,
+                 output_file_usage, output_file_raw, price_per_kw, retain_days, influxdb, output_to_cli):
+        self.api_url = api_url
+        self.username = username
+        self.password = password
+        self.account = account
+        self.service_location = service_location
+        self.extract_days = extract_days
+        self.interval = interval
+        self.output_file_usage = output_file_usage
+        self.output_file_raw = output_file_raw
+        self.price_per_kw = price_per_kw
+        self.retain_days = retain_days
+        self.influxdb = influxdb
+        self.output_to_cli = output_to_cli
+
+        # Static parts of every readings request, only the date range varies per call
+        self.readings_url = (f"{api_url}/services/secured/readings/graph/{service_location}/{account}"
+                             f"?applicationName=CONSUMER&graphUnitOfMeasure=KWH&timeFrame={interval}")
+        self.readings_headers = {
+            'x-nisc-smarthub-username': username,
+            'Content-Type': 'application/json'
+        }
+
+def load_config(config_file):
+    with open(config_file, 'r') as file:
+        config_data = yaml.safe_load(file)
+        return Config(
+            api_url=config_data.get('api_url'),
+            username=config_data.get('username'),
+            password=config_data.get('password'),
+            account=config_data.get('account'),
+            service_location=config_data.get('service_location'),
+            extract_days=config_data.get('extract_days'),
+            interval=config_data.get('interval'),
+            output_file_usage=config_data.get('output_file_usage'),
+            output_file_raw=config_data.get('output_file_raw'),
+            price_per_kw=config_data.get('price_per_kw'),
+            retain_days=config_data.get('retain_days'),
+            influxdb=config_data.get('influxdb'),
+            output_to_cli=config_data.get('output_to_cli', False)  # Default to False if not specified
+        )
+
+def calculate_date_range(days, window_days=1):
+    # Split the last `days` calendar days into (start, end) windows of `window_days` each
+    today = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    first_day = today - datetime.timedelta(days=days - 1)
+    range_end = today + datetime.timedelta(days=1)
+
+    windows = []
+    for offset in range(0, days, window_days):
+        window_start = first_day + datetime.timedelta(days=offset)
+        window_end = min(window_start + datetime.timedelta(days=window_days), range_end)
+        windows.append((window_start, window_end - datetime.timedelta(seconds=1)))
+    return windows
+
+def is_transient(error):
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+def retention_cutoff_ms(days):
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+    return int(cutoff.timestamp() * 1000)
+
+def retrying():
+    # First attempt plus up to 5 retries, backing off 0.5s, 1s, 2s, ...
+    return AsyncRetrying(retry=retry_if_exception(is_transient), wait=wait_exponential(multiplier=0.5),
+                         stop=stop_after_attempt(6), reraise=True)
+
+async def auth(session, config):
+    form_data = {
+        'userId': config.username,
+        'password': config.password
+    }
+    auth_url = f"{config.api_url}/services/oauth/auth/v2"
+    parsed = urlparse(config.api_url)
+    authority = parsed.hostname
+
+    headers = {
+        'authority': authority
+    }
+
+    try:
+        async for attempt in retrying():
+            with attempt:
+                async with session.post(auth_url, data=form_data, headers=headers) as response:
+                    response.raise_for_status()
+                    body = await response.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return "", str(e)
+
+    try:
+        oauth_data = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        return "", str(e)
+
+    authorization_token = oauth_data.get('authorizationToken', '')
+    if not authorization_token:
+        return "", "auth response did not include auth token"
+
+    return authorization_token, None
+
+async def fetch_data(session, start, end, config, jwt):
+    start_timestamp = int(start.timestamp() * 1000)
+    end_timestamp = int(end.timestamp() * 1000)
+
+    url = f"{config.readings_url}&startDateTime={start_timestamp}&endDateTime={end_timestamp}"
+    headers = dict(config.readings_headers, Authorization=f"Bearer {jwt}")
+
+    try:
+        async for attempt in retrying():
+            with attempt:
+                async with session.get(url, headers=headers) as response:
+                    response.raise_for_status()
+                    body = await response.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return None, str(e)
+
+    return body, None
+
+def merge_json_arrays(bodies):
+    # Splice the per-window JSON arrays into one without decoding them
+    parts = [body.strip()[1:-1].strip() for body in bodies]
+    return b'[' + b','.join(part for part in parts if part) + b']'
+
+async def fetch_all(session, windows, config, jwt):
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+    async def fetch_window(start, end):
+        async with semaphore:
+            return await fetch_data(session, start, end, config, jwt)
+
+    results = await asyncio.gather(*(fetch_window(start, end) for start, end in windows))
+
+    for body, error in results:
+        if error:
+            return None, error
+        if not body.strip().startswith(b'['):
+            return None, "readings response was not a JSON array"
+
+    return merge_json_arrays(body for body, _ in results), None
+
+def iter_reads(json_data):
+    # Yield one (meter_location, meter_id, channel, start_time, total, minimum, maximum) tuple per read
+    for item in json_data:
+        meter_location = item.get('meterLocation')
+        for reading in item.get('readings', []):
+            meter_id = reading.get('meterId')
+            channel = reading.get('channel')
+            for read in reading.get('reads', []):
+                start_time = read.get('interval', {}).get('start')
+                metrics = read.get('metrics', {})
+                yield (meter_location, meter_id, channel, start_time,
+                       metrics.get('total'), metrics.get('minimum'), metrics.get('maximum'))
+
+class UsageResponse:
+    # The fetched response bytes and their decoded JSON, decoded at most once no matter how
+    # many sinks ask for it. A failed decode is remembered and re-raised.
+    def __init__(self, data):
+        self.data = data
+        self._json_data = None
+        self._error = None
+        self._lock = threading.Lock()
+
+    @property
+    def json_data(self):
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._json_data is None:
+                try:
+                    self._json_data = orjson.loads(self.data)
+                except orjson.JSONDecodeError as e:
+                    self._error = e
+                    raise
+            return self._json_data
+
+    @property
+    def reads(self):
+        # A fresh iterator over the shared decoded tree for each caller
+        return iter_reads(self.json_data)
+
+def create_session():
+    # One pooled, keep-alive session serves auth and every fetch in a run
+    connector = aiohttp.TCPConnector(limit=20, limit_per_host=FETCH_CONCURRENCY, ssl=False, keepalive_timeout=60)
+    # Ask for compressed bodies explicitly, aiohttp decompresses them transparently
+    headers = {
+        'Accept': 'application/json',
+        'Accept-Encoding': 'gzip, deflate'
+    }
+    # Bound connect and per-read waits so a hung upstream fails into a retry instead of stalling the run
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=30)
+    return aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout)
+
+async def fetch_usage(config):
+    # Monthly totals only make sense over the whole range, finer intervals are fetched a day at a time
+    window_days = config.extract_days if config.interval == 'MONTHLY' else 1
+    windows = calculate_date_range(config.extract_days, window_days)
+
+    async with create_session() as session:
+        jwt, error = await auth(session, config)
+        if error:
+            return None, f"Authentication failed: {error}"
+
+        data, error = await fetch_all(session, windows, config, jwt)
+        if error:
+            return None, f"Data fetching failed: {error}"
+
+    return data, None
+
+async def run(config, sinks):
+    # Fetch once and hand the same response to every sink
+    data, error = await fetch_usage(config)
+    if error:
+        print(error)
+        return
+
+    response = UsageResponse(data)
+    await asyncio.gather(*(asyncio.to_thread(sink, response, config) for sink in sinks))
@@ -0,0 +1,25 @@
+from influxdb_client import InfluxDBClient
+from influxdb_client.client.write_api import WriteOptions, WriteType
+
+# Points per InfluxDB write request, sent gzipped from the client's background batching thread
+INFLUX_BATCH_SIZE = 5000
+WRITE_OPTIONS = WriteOptions(write_type=WriteType.batching, batch_size=INFLUX_BATCH_SIZE, flush_interval=2_000)
+
+def write_records(records, config):
+    # Callers pass records in time order: those compress better over gzip and arrive at InfluxDB as monotonic runs
+    # Batches are written in the background, so failures only surface through the error callback
+    errors = []
+
+    def on_error(conf, data, exception):
+        errors.append(exception)
+
+    with InfluxDBClient(url=config.influxdb['url'], token=config.influxdb['token'], org=config.influxdb['org'],
+                        enable_gzip=True) as client:
+        # Closing the write api flushes whatever is still queued
+        with client.write_api(write_options=WRITE_OPTIONS, error_callback=on_error) as write_api:
+            write_api.write(bucket=config.influxdb['bucket'], record=records)
+
+    for error in errors:
+        print(f"Error writing to InfluxDB: {error}")
+
+    return not errors
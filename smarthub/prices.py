@@ -0,0 +1,99 @@
+import datetime
+from operator import itemgetter
+import ijson
+import orjson
+import numpy as np
+from influxdb_client import Point, WritePrecision
+from smarthub.core import retention_cutoff_ms
+from smarthub.influxdb import write_records
+
+def process_data(reads, price_per_kw, cutoff_ms=0):
+    starts_ms = []
+    totals = []
+    for _, _, _, start_time, total, _, _ in reads:
+        start_time = int(start_time or 0)
+        if start_time < cutoff_ms:
+            continue
+        starts_ms.append(start_time)
+        totals.append(total or 0.0)
+
+    if not starts_ms:
+        return []
+
+    # Format timestamps and price every read in bulk rather than row by row
+    starts = np.asarray(starts_ms, dtype='datetime64[ms]')
+    totals = np.asarray(totals, dtype=np.float64)
+    prices = totals * price_per_kw
+    start_times = np.char.replace(np.datetime_as_string(starts, unit='s'), 'T', ' ')
+
+    return [
+        {
+            'Start Time': start_time_formatted,
+            'start_epoch': start_time,
+            'Total': total,
+            'Price': price
+        }
+        for start_time_formatted, start_time, total, price
+        in zip(start_times.tolist(), starts_ms, totals.tolist(), prices.tolist())
+    ]
+
+def save_to_json(data, output_file, retain_days):
+    cutoff_ms = retention_cutoff_ms(retain_days)
+
+    # Stream the existing file and keep only entries still inside the retention window
+    existing_data_dict = {}
+    try:
+        with open(output_file, 'rb') as jsonfile:
+            for entry in ijson.items(jsonfile, 'item', use_float=True):
+                start_epoch = entry_epoch(entry)
+                if start_epoch >= cutoff_ms:
+                    existing_data_dict[start_epoch] = entry
+    except FileNotFoundError:
+        pass
+    except ijson.JSONError:
+        existing_data_dict = {}
+
+    for entry in data:
+        if entry['start_epoch'] >= cutoff_ms:
+            existing_data_dict[entry['start_epoch']] = entry
+
+    filtered_data = list(existing_data_dict.values())
+
+    with open(output_file, 'wb') as jsonfile:
+        jsonfile.write(orjson.dumps(filtered_data, option=orjson.OPT_INDENT_2))
+
+def entry_epoch(entry):
+    # Entries saved before start_epoch was added only carry the formatted 'Start Time'
+    if 'start_epoch' not in entry:
+        start = parse_datetime(entry['Start Time'])
+        entry['start_epoch'] = int(start.timestamp() * 1000) if start else 0
+    return entry['start_epoch']
+
+def parse_datetime(date_str):
+    try:
+        return datetime.datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S').replace(tzinfo=datetime.timezone.utc)
+    except ValueError:
+        return None
+
+def write_to_influxdb(data, config):
+    points = []
+    for entry in sorted(data, key=itemgetter('start_epoch')):
+        point = Point("energy_usage").tag("location", config.service_location).field("total_kwh", entry['Total']).field("price", entry['Price']).time(entry['start_epoch'] * 1_000_000, WritePrecision.NS)
+        points.append(point)
+
+    write_records(points, config)
+
+def sink(response, config):
+    try:
+        reads = response.reads
+    except orjson.JSONDecodeError as e:
+        print(f"Error decoding JSON: {e}")
+        return
+
+    # Reads older than both the JSON and the InfluxDB retention are never kept, skip them before any formatting
+    influx_retention_days = config.influxdb.get('retention_days', config.retain_days)
+    cutoff_ms = retention_cutoff_ms(max(config.retain_days, influx_retention_days))
+    processed_data = process_data(reads, config.price_per_kw, cutoff_ms)
+
+    save_to_json(processed_data, config.output_file_usage, config.retain_days)
+    write_to_influxdb(processed_data, config)  # Push data to InfluxDB
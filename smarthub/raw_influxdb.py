@@ -0,0 +1,62 @@
+import math
+from collections import defaultdict
+from operator import itemgetter
+import orjson
+from smarthub.core import retention_cutoff_ms
+from smarthub.influxdb import write_records
+
+# Line protocol requires commas, spaces, equals signs and line breaks in tag values to be escaped
+TAG_ESCAPES = str.maketrans({',': '\\,', ' ': '\\ ', '=': '\\=', '\n': '\\n', '\r': '\\r', '\t': '\\t'})
+
+def format_tags(**tags):
+    # Like Point, leave out tags with no value, an empty tag value is invalid line protocol
+    escaped = ((key, str(value).translate(TAG_ESCAPES)) for key, value in tags.items() if value is not None)
+    return "".join(f",{key}={value}" for key, value in escaped if value)
+
+def format_line(meter_location, meter_id, channel, start_time, total, minimum, maximum):
+    # Like Point, skip missing and non-finite fields, InfluxDB rejects nan and inf
+    fields = ",".join(f"{name}={float(value)!r}"
+                      for name, value in (("total_kwh", total), ("min_kwh", minimum), ("max_kwh", maximum))
+                      if value is not None and math.isfinite(value))
+    if not fields:
+        return None
+
+    tags = format_tags(location=meter_location, meter_id=meter_id, channel=channel)
+    return f"energy_usage{tags} {fields} {int(start_time) * 1_000_000}"
+
+def write_to_influxdb(reads, config):
+    # Lines grouped per series (location, meter_id, channel) so each one reaches InfluxDB contiguously
+    series = defaultdict(list)
+    skipped = 0
+    retention_days = config.influxdb['retention_days']
+    cutoff_ms = retention_cutoff_ms(retention_days)
+
+    for meter_location, meter_id, channel, start_time, total, minimum, maximum in sorted(reads, key=itemgetter(3)):
+        if start_time < cutoff_ms:
+            skipped += 1
+            continue
+
+        line = format_line(meter_location, meter_id, channel, start_time, total, minimum, maximum)
+        if line is not None:
+            series[(meter_location, meter_id, channel)].append(line)
+
+    if skipped:
+        print(f"Skipping {skipped} points older than {retention_days} days as they are beyond the retention period.")
+
+    if not series:
+        print("No valid points to write to InfluxDB.")
+        return
+
+    write_records([line for lines in series.values() for line in lines], config)
+
+def sink(response, config):
+    if config.output_to_cli:
+        print(response.data)
+
+    try:
+        reads = response.reads
+    except orjson.JSONDecodeError as e:
+        print(f"Error decoding JSON: {e}")
+        return
+
+    write_to_influxdb(reads, config)
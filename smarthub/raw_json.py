@@ -0,0 +1,14 @@
+import orjson
+
+def save_to_json(data, output_file):
+    with open(output_file, 'wb') as jsonfile:
+        jsonfile.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+def sink(response, config):
+    try:
+        json_data = response.json_data
+    except orjson.JSONDecodeError as e:
+        print(f"Error decoding JSON: {e}")
+        return
+
+    save_to_json(json_data, config.output_file_raw or config.output_file_usage)